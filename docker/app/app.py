@@ -1,68 +1,139 @@
+import startup  # первым: отсюда считается время импорта
+
 from flask import Flask, jsonify, request, Response
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from sqlalchemy import create_engine, text
-import os, time, random
+import os, random
 
-app = Flask(__name__)
+import batching, cache, db, fibcalc, metrics, queries
 
-# ---- Metrics ----
-REQ = Counter("http_requests_total", "Total HTTP requests", ["method", "endpoint", "code"])
-LAT = Histogram("http_request_duration_seconds", "Request latency seconds", ["endpoint"])
+app = Flask(__name__)
 
 # ---- Database ----
-DB_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/appdb")
-engine = create_engine(DB_URL, pool_pre_ping=True, future=True)
+# Движок ленивый (db.get_engine): соединения открывает прогрев воркера, а не импорт.
+items_cache = cache.ResponseCache(cache.make_backend(cache.CACHE_BACKEND))
+writer = batching.WriteBatcher(db.get_engine, on_commit=items_cache.invalidate)
+
+
+def load_items_page(params, key, gen, path, args):
+    sql, binds = queries.page_query(params)
+    with db.get_engine().begin() as conn:
+        rows = conn.execute(sql, binds).all()
+    body, headers = queries.page_response(rows, params, path, args)
+    return items_cache.store(key, body, gen, headers)
+
+
+# ---- Warm-up ----
+# Шаги выполняет gunicorn (post_worker_init) до первого запроса; /ready отвечает 200 после них.
+def warm_items_cache():
+    # Первая страница без параметров — самый частый запрос; заодно компилируется SQL.
+    params = queries.parse_page({})
+    key = queries.cache_key(params)
+    entry, gen = items_cache.lookup(key)
+    if entry is None:
+        load_items_page(params, key, gen, "/items", {})
 
-# ---- Helpers ----
-def record(endpoint, method, code, start_time):
-    REQ.labels(method, endpoint, str(code)).inc()
-    LAT.labels(endpoint).observe(time.time() - start_time)
+
+startup.register("db", lambda: db.warm_pool(db.get_engine()))
+startup.register("cache", warm_items_cache)
+startup.register("compute", fibcalc.warm_pool)
 
 # ---- Routes ----
 @app.get("/health")
 def health():
-    start = time.time()
     payload = {"status": "ok"}
-    record("/health", "GET", 200, start)
     return jsonify(payload), 200
 
+@app.get("/ready")
+def ready():
+    # 503, пока воркер не прогрет; каждый вызов пытается доделать прогрев (например, если БД поднялась позже).
+    ok = startup.warm()
+    return jsonify(startup.status()), 200 if ok else 503
+
 @app.get("/env")
 def env():
-    start = time.time()
     payload = {"app_env": os.getenv("APP_ENV", "dev")}
-    record("/env", "GET", 200, start)
     return jsonify(payload), 200
 
 @app.route("/items", methods=["GET", "POST"])
 def items():
-    start = time.time()
     if request.method == "POST":
         data = request.get_json(silent=True) or {}
         name = data.get("name") or f"item-{random.randint(1000, 9999)}"
-        with engine.begin() as conn:
-            conn.execute(text("INSERT INTO items(name) VALUES (:name)"), {"name": name})
-        record("/items", "POST", 201, start)
-        return jsonify({"message": "created", "name": name}), 201
+        if batching.WRITE_MODE == "single":
+            new_id = batching.insert_single(db.get_engine(), name)
+            items_cache.invalidate()
+        else:
+            try:
+                new_id = writer.submit(name)
+            except batching.WriteTimeout as e:
+                # Пачка может закоммититься позже: клиенту не стоит слепо повторять запрос.
+                return jsonify({"error": str(e)}), 504
+        return jsonify({"message": "created", "id": new_id, "name": name}), 201
     else:
-        with engine.begin() as conn:
-            rows = conn.execute(text("SELECT id, name FROM items ORDER BY id DESC LIMIT 10")).all()
-        out = [{"id": r[0], "name": r[1]} for r in rows]
-        record("/items", "GET", 200, start)
-        return jsonify(out), 200
+        # Keyset-пагинация: ?limit=&after=<курсор>&since=&until= (ISO 8601, по created_at).
+        try:
+            params = queries.parse_page(request.args)
+        except queries.QueryParamError as e:
+            return jsonify({"error": str(e)}), 400
+        key = queries.cache_key(params)
+        entry, gen = items_cache.lookup(key)
+        if entry is None:
+            entry = load_items_page(params, key, gen, request.path, request.args.to_dict())
+        # ETag совпал — отвечаем 304 без тела (и без БД, если запись была в кэше).
+        if request.if_none_match.contains_weak(entry.etag):
+            resp = Response(status=304)
+        else:
+            resp = Response(entry.body, mimetype="application/json")
+        resp.set_etag(entry.etag)
+        resp.headers.update(entry.headers)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+@app.post("/items/bulk")
+def items_bulk():
+    # Принимает JSON-массив или NDJSON (application/x-ndjson) и грузит одной транзакцией.
+    try:
+        if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+            names = batching.iter_ndjson(request.stream)
+        else:
+            names = batching.iter_json_array(request.get_json(silent=True))
+        inserted = batching.bulk_insert(db.get_engine(), names)
+        items_cache.invalidate()
+    except batching.BulkFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"message": "created", "inserted": inserted}), 201
+
+@app.get("/items/export")
+def items_export():
+    # Потоковая выгрузка всей таблицы (или диапазона created_at) в NDJSON/CSV.
+    try:
+        fmt, params = queries.parse_export(request.args)
+    except queries.QueryParamError as e:
+        return jsonify({"error": str(e)}), 400
+    chunks = queries.iter_export(db.get_engine(), params, fmt)
+    resp = Response(chunks, mimetype=queries.EXPORT_FORMATS[fmt])
+    resp.headers["Content-Disposition"] = f"attachment; filename=items.{fmt}"
+    return resp
 
 @app.get("/compute")
 def compute():
-    start = time.time()
-    n = int(request.args.get("n", "32"))
-    def fib(x):
-        return x if x <= 1 else fib(x-1) + fib(x-2)
-    res = fib(n)
-    record("/compute", "GET", 200, start)
-    return jsonify({"n": n, "fib": res}), 200
+    try:
+        n = fibcalc.parse_n(request.args.get("n", "32"))
+        res = fibcalc.run(n)
+    except fibcalc.ComputeInputError as e:
+        return jsonify({"error": str(e)}), 400
+    except fibcalc.ComputeTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    return Response(fibcalc.to_json(n, res), mimetype="application/json")
 
 @app.get("/metrics")
-def metrics():
-    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+def metrics_view():
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE_LATEST)
+
+# HTTP-метрики пишутся хуками для всех маршрутов выше.
+metrics.init_flask(app)
+
+startup.imported()
 
 if __name__ == "__main__":
+    startup.warm()
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
\ No newline at end of file
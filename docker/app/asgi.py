@@ -0,0 +1,171 @@
+# Асинхронный режим сервера (SERVER_MODE=async): те же маршруты, что в app.py,
+# на Starlette + uvicorn с асинхронным движком SQLAlchemy (asyncpg).
+# Почему отдельный режим: в sync-режиме одновременно обслуживается не больше
+# workers * threads запросов, и каждое ожидание БД держит поток; здесь ожидание —
+# это просто точка переключения event loop.
+import startup  # первым: отсюда считается время импорта
+
+import contextlib, os, random
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import batching, cache, db, fibcalc, metrics, queries
+
+# ---- Database ----
+items_cache = cache.ResponseCache(cache.make_backend(cache.CACHE_BACKEND))
+writer = batching.AsyncWriteBatcher(db.get_async_engine, on_commit=items_cache.invalidate)
+
+
+async def load_items_page(params, key, gen, path, args):
+    sql, binds = queries.page_query(params)
+    async with db.get_async_engine().connect() as conn:
+        rows = (await conn.execute(sql, binds)).all()
+    body, headers = queries.page_response(rows, params, path, args)
+    return items_cache.store(key, body, gen, headers)
+
+
+# ---- Warm-up ----
+# В lifespan, а не в хуке gunicorn: соединения asyncpg привязаны к event loop воркера.
+async def warm_items_cache():
+    params = queries.parse_page({})
+    key = queries.cache_key(params)
+    entry, gen = items_cache.lookup(key)
+    if entry is None:
+        await load_items_page(params, key, gen, "/items", {})
+
+
+startup.register("db", lambda: db.warm_pool_async(db.get_async_engine()))
+startup.register("cache", warm_items_cache)
+startup.register("compute", fibcalc.warm_pool)
+
+
+# ---- Helpers ----
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any(t.removeprefix("W/").strip('"') == etag for t in tags)
+
+
+# ---- Routes ----
+async def health(request: Request):
+    return JSONResponse({"status": "ok"})
+
+
+async def ready(request: Request):
+    ok = await startup.warm_async()
+    return JSONResponse(startup.status(), status_code=200 if ok else 503)
+
+
+async def env(request: Request):
+    return JSONResponse({"app_env": os.getenv("APP_ENV", "dev")})
+
+
+async def items(request: Request):
+    if request.method == "POST":
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        data = data if isinstance(data, dict) else {}
+        name = data.get("name") or f"item-{random.randint(1000, 9999)}"
+        if batching.WRITE_MODE == "single":
+            new_id = await batching.insert_single_async(db.get_async_engine(), name)
+            items_cache.invalidate()
+        else:
+            try:
+                new_id = await writer.submit(name)
+            except batching.WriteTimeout as e:
+                return JSONResponse({"error": str(e)}, status_code=504)
+        return JSONResponse({"message": "created", "id": new_id, "name": name}, status_code=201)
+
+    try:
+        params = queries.parse_page(request.query_params)
+    except queries.QueryParamError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    key = queries.cache_key(params)
+    entry, gen = items_cache.lookup(key)
+    if entry is None:
+        entry = await load_items_page(params, key, gen, request.url.path, dict(request.query_params))
+    headers = {**entry.headers, "ETag": f'"{entry.etag}"', "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        resp = Response(status_code=304, headers=headers)
+    else:
+        resp = Response(entry.body, media_type="application/json", headers=headers)
+    return resp
+
+
+async def items_bulk(request: Request):
+    # Как в app.py: JSON-массив или NDJSON-поток, одна транзакция.
+    mimetype = request.headers.get("content-type", "").partition(";")[0].strip()
+    try:
+        if mimetype in ("application/x-ndjson", "application/jsonl"):
+            names = batching.aiter_ndjson(request.stream())
+        else:
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+            names = batching.iter_json_array(data)
+        inserted = await batching.bulk_insert_async(db.get_async_engine(), names)
+        items_cache.invalidate()
+    except batching.BulkFormatError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"message": "created", "inserted": inserted}, status_code=201)
+
+
+async def items_export(request: Request):
+    try:
+        fmt, params = queries.parse_export(request.query_params)
+    except queries.QueryParamError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return StreamingResponse(queries.aiter_export(db.get_async_engine(), params, fmt),
+                             media_type=queries.EXPORT_FORMATS[fmt],
+                             headers={"Content-Disposition": f"attachment; filename=items.{fmt}"})
+
+
+async def compute(request: Request):
+    try:
+        n = fibcalc.parse_n(request.query_params.get("n", "32"))
+        res = await fibcalc.run_async(n)
+    except fibcalc.ComputeInputError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except fibcalc.ComputeTimeout as e:
+        return JSONResponse({"error": str(e)}, status_code=504)
+    return Response(fibcalc.to_json(n, res), media_type="application/json")
+
+
+async def metrics_view(request: Request):
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await startup.warm_async()  # неудача не роняет воркер: /ready вернёт 503 и повторит прогрев
+    yield
+    await db.get_async_engine().dispose()
+
+
+routes = [
+    Route("/health", health),
+    Route("/ready", ready),
+    Route("/env", env),
+    Route("/items", items, methods=["GET", "POST"]),
+    Route("/items/bulk", items_bulk, methods=["POST"]),
+    Route("/items/export", items_export),
+    Route("/compute", compute),
+    Route("/metrics", metrics_view),
+]
+metrics.prebind((m, r.path) for r in routes for m in r.methods - {"HEAD"})
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(metrics.MetricsMiddleware, endpoints=[r.path for r in routes])],
+    lifespan=lifespan,
+)
+
+startup.imported()
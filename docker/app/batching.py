@@ -0,0 +1,367 @@
+# Групповая запись в items (group commit).
+# Почему: каждая транзакция в Postgres упирается в fsync на COMMIT, поэтому
+# конкурентные POST /items копятся в очереди и сбрасываются одним многострочным
+# INSERT — один COMMIT на пачку, а каждый клиент всё равно получает свой id.
+import asyncio, io, json, os, queue, sys, threading, time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from prometheus_client import Histogram
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, Text, insert
+
+# ---- Settings ----
+WRITE_MODE = os.getenv("ITEMS_WRITE_MODE", "batch")          # batch | single (старый путь: 1 строка = 1 транзакция)
+BATCH_MAX = int(os.getenv("ITEMS_BATCH_MAX", "256"))         # максимум строк в одной пачке
+BATCH_WINDOW_MS = float(os.getenv("ITEMS_BATCH_WINDOW_MS", "2"))  # сколько ждём попутчиков после первой строки
+WRITE_TIMEOUT = float(os.getenv("ITEMS_WRITE_TIMEOUT", "5"))  # сколько запрос ждёт результата сброса
+BULK_CHUNK = int(os.getenv("ITEMS_BULK_CHUNK", "5000"))      # размер порции executemany для /items/bulk
+
+# ---- Schema ----
+items_table = Table(
+    "items", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("name", Text, nullable=False),
+    Column("created_at", DateTime),
+)
+
+# ---- Metrics ----
+# path: single — POST без группировки, batch — group commit, bulk — /items/bulk
+BATCH_SIZE = Histogram("items_write_batch_size", "Rows written per INSERT transaction", ["path"],
+                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536))
+FLUSH_LAT = Histogram("items_write_flush_seconds", "Duration of one INSERT transaction", ["path"])
+
+
+class WriteTimeout(Exception):
+    """Пачка не сброшена за ITEMS_WRITE_TIMEOUT (ответ 504). Строка всё ещё может записаться позже."""
+
+
+class BulkFormatError(ValueError):
+    """Некорректная строка во входных данных /items/bulk."""
+
+
+def _flush_failed(batch, e):
+    # Сбросчик один на воркер: его падение оставило бы очередь без читателя, а строки в ней —
+    # без ответа. Поэтому ошибку только логируем; клиенты без ответа получают её же.
+    print(f"batching: flush failed: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+    for _, fut in batch:
+        if not fut.done():
+            fut.set_exception(e)
+
+
+def insert_single(engine, name):
+    """Старый путь: одна строка — одна транзакция. Оставлен для сравнения."""
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        new_id = conn.execute(insert(items_table).returning(items_table.c.id), {"name": name}).scalar_one()
+    FLUSH_LAT.labels("single").observe(time.perf_counter() - start)
+    BATCH_SIZE.labels("single").observe(1)
+    return new_id
+
+
+class WriteBatcher:
+    """Копит вставки из разных потоков и пишет их одним INSERT ... RETURNING id."""
+
+    def __init__(self, get_engine, max_batch=BATCH_MAX, window_ms=BATCH_WINDOW_MS, on_commit=None):
+        self.get_engine = get_engine  # функция, а не движок: движок создаётся лениво (db.get_engine)
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        self.on_commit = on_commit
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Поток стартует лениво и заново после fork: gunicorn форкает воркеры,
+        # а потоки родителя в дочерний процесс не переходят.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name="items-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, name, timeout=WRITE_TIMEOUT):
+        """Ставит строку в очередь и ждёт сброса пачки; возвращает id новой записи."""
+        self._ensure_started()
+        fut = Future()
+        self._queue.put((name, fut))
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            raise WriteTimeout(f"write not confirmed within {timeout}s; the row may still be committed") from None
+
+    def _run(self):
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._flush(batch)
+            except Exception as e:  # например, on_commit не смог сдвинуть поколение кэша
+                _flush_failed(batch, e)
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        try:
+            # sort_by_parameter_order гарантирует, что id вернутся в порядке строк пачки.
+            stmt = insert(items_table).returning(items_table.c.id, sort_by_parameter_order=True)
+            with self.get_engine().begin() as conn:
+                ids = conn.execute(stmt, [{"name": name} for name, _ in batch]).scalars().all()
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        FLUSH_LAT.labels("batch").observe(time.perf_counter() - start)
+        BATCH_SIZE.labels("batch").observe(len(batch))
+        # Сначала инвалидация кэша, потом ответ клиенту: иначе GET сразу после 201 может
+        # прочитать старую страницу из кэша (read-your-writes).
+        try:
+            if self.on_commit:
+                self.on_commit()
+        finally:
+            for (_, fut), new_id in zip(batch, ids):
+                fut.set_result(new_id)
+
+
+async def insert_single_async(engine, name):
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        new_id = (await conn.execute(insert(items_table).returning(items_table.c.id), {"name": name})).scalar_one()
+    FLUSH_LAT.labels("single").observe(time.perf_counter() - start)
+    BATCH_SIZE.labels("single").observe(1)
+    return new_id
+
+
+class AsyncWriteBatcher:
+    """Тот же group commit для ASGI-режима: очередь asyncio и одна задача-сбросчик на event loop."""
+
+    def __init__(self, get_engine, max_batch=BATCH_MAX, window_ms=BATCH_WINDOW_MS, on_commit=None):
+        self.get_engine = get_engine
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        self.on_commit = on_commit
+        self._queue = None
+        self._task = None
+
+    async def submit(self, name, timeout=WRITE_TIMEOUT):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((name, fut))
+        # shield: таймаут клиента не должен отменять результат, общий для всей пачки.
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            raise WriteTimeout(f"write not confirmed within {timeout}s; the row may still be committed") from None
+
+    async def _run(self):
+        q, loop = self._queue, asyncio.get_running_loop()
+        while True:
+            batch = [await q.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                try:
+                    batch.append(await asyncio.wait_for(q.get(), remaining) if remaining > 0 else q.get_nowait())
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                _flush_failed(batch, e)
+
+    async def _flush(self, batch):
+        start = time.perf_counter()
+        try:
+            stmt = insert(items_table).returning(items_table.c.id, sort_by_parameter_order=True)
+            async with self.get_engine().begin() as conn:
+                ids = (await conn.execute(stmt, [{"name": name} for name, _ in batch])).scalars().all()
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        FLUSH_LAT.labels("batch").observe(time.perf_counter() - start)
+        BATCH_SIZE.labels("batch").observe(len(batch))
+        try:
+            if self.on_commit:
+                self.on_commit()  # до ответа клиенту, как в WriteBatcher
+        finally:
+            for (_, fut), new_id in zip(batch, ids):
+                if not fut.done():
+                    fut.set_result(new_id)
+
+
+# ---- Bulk load ----
+def _name_of(obj, where):
+    name = obj.get("name") if isinstance(obj, dict) else obj
+    if not isinstance(name, str) or not name:
+        raise BulkFormatError(f"{where}: expected non-empty string or {{\"name\": ...}}")
+    return name
+
+
+def iter_json_array(data):
+    """Имена из JSON-массива: ["a", {"name": "b"}, ...]."""
+    if not isinstance(data, list):
+        raise BulkFormatError("body must be a JSON array")
+    for i, obj in enumerate(data):
+        yield _name_of(obj, f"item {i}")
+
+
+def _ndjson_name(lineno, raw):
+    line = raw.strip()
+    if not line:
+        return None
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        raise BulkFormatError(f"line {lineno}: invalid JSON")
+    return _name_of(obj, f"line {lineno}")
+
+
+def iter_ndjson(stream):
+    """Имена из NDJSON-потока; читаем построчно, не держа тело целиком в памяти."""
+    for lineno, raw in enumerate(stream, 1):
+        name = _ndjson_name(lineno, raw)
+        if name is not None:
+            yield name
+
+
+async def aiter_ndjson(chunks):
+    """То же для ASGI: тело приходит чанками (request.stream()), строки собираем сами."""
+    buf, lineno = b"", 0
+    async for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for raw in lines:
+            lineno += 1
+            name = _ndjson_name(lineno, raw)
+            if name is not None:
+                yield name
+    name = _ndjson_name(lineno + 1, buf)
+    if name is not None:
+        yield name
+
+
+class _CopySource(io.RawIOBase):
+    """Файлоподобный источник для COPY FROM STDIN поверх генератора имён."""
+
+    def __init__(self, names):
+        self._names = names
+        self._buf = b""
+        self.rows = 0
+        self.error = None
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        size = 65536 if size is None or size < 0 else size
+        try:
+            while len(self._buf) < size:
+                name = next(self._names, None)
+                if name is None:
+                    break
+                esc = name.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+                self._buf += esc.encode("utf-8") + b"\n"
+                self.rows += 1
+        except BulkFormatError as e:
+            # psycopg2 заворачивает исключения из read(); сохраняем исходное для ответа 400.
+            self.error = e
+            raise
+        out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+
+def bulk_insert(engine, names):
+    """Загружает все имена одной транзакцией: COPY для psycopg2, иначе executemany порциями."""
+    start = time.perf_counter()
+    rows = 0
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+            src = _CopySource(iter(names))
+            cur = conn.connection.driver_connection.cursor()
+            try:
+                cur.copy_expert("COPY items(name) FROM STDIN", src, size=65536)
+            except Exception:
+                if src.error is not None:
+                    raise src.error
+                raise
+            finally:
+                cur.close()
+            rows = src.rows
+        else:
+            chunk = []
+            for name in names:
+                chunk.append({"name": name})
+                if len(chunk) >= BULK_CHUNK:
+                    conn.execute(insert(items_table), chunk)
+                    rows += len(chunk)
+                    chunk = []
+            if chunk:
+                conn.execute(insert(items_table), chunk)
+                rows += len(chunk)
+    FLUSH_LAT.labels("bulk").observe(time.perf_counter() - start)
+    BATCH_SIZE.labels("bulk").observe(rows)
+    return rows
+
+
+async def _aiter(names):
+    if hasattr(names, "__aiter__"):
+        async for name in names:
+            yield name
+    else:
+        for name in names:
+            yield name
+
+
+async def bulk_insert_async(engine, names):
+    """bulk_insert для ASGI-режима: COPY через asyncpg (copy_records_to_table), иначе executemany порциями.
+    names — обычный или асинхронный итератор имён."""
+    start = time.perf_counter()
+    rows = 0
+    async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql" and engine.dialect.driver == "asyncpg":
+            error = None
+
+            async def records():
+                nonlocal rows, error
+                try:
+                    async for name in _aiter(names):
+                        rows += 1
+                        yield (name,)
+                except BulkFormatError as e:
+                    error = e  # asyncpg может завернуть исключение источника — сохраняем исходное для 400
+                    raise
+
+            raw = await conn.get_raw_connection()
+            try:
+                await raw.driver_connection.copy_records_to_table("items", records=records(), columns=["name"])
+            except Exception:
+                if error is not None:
+                    raise error
+                raise
+        else:
+            chunk = []
+            async for name in _aiter(names):
+                chunk.append({"name": name})
+                if len(chunk) >= BULK_CHUNK:
+                    await conn.execute(insert(items_table), chunk)
+                    rows += len(chunk)
+                    chunk = []
+            if chunk:
+                await conn.execute(insert(items_table), chunk)
+                rows += len(chunk)
+    FLUSH_LAT.labels("bulk").observe(time.perf_counter() - start)
+    BATCH_SIZE.labels("bulk").observe(rows)
+    return rows
@@ -0,0 +1,152 @@
+# Кэш сериализованных ответов GET /items.
+# Почему: выборка меняется только после записи, а запрос в Postgres идёт на каждый GET.
+# Тело ответа хранится в памяти воркера с TTL; запись сбрасывает кэш через «поколение»
+# в общем бэкенде, поэтому инвалидацию видят все gunicorn-воркеры (и реплики — с Redis).
+import hashlib, os, threading, time, uuid
+from collections import OrderedDict, namedtuple
+
+from prometheus_client import Counter
+
+# ---- Settings ----
+CACHE_TTL = float(os.getenv("ITEMS_CACHE_TTL", "5"))                 # секунды; 0 — кэш выключен
+CACHE_MAX_ENTRIES = int(os.getenv("ITEMS_CACHE_MAX_ENTRIES", "128"))  # LRU-граница по ключам
+# local — только этот процесс; file:///path — все воркеры на хосте; redis://host:6379/0 — все реплики
+CACHE_BACKEND = os.getenv("ITEMS_CACHE_BACKEND", "file:///tmp/devops-lab-items-cache.gen")
+
+# ---- Metrics ----
+HITS = Counter("items_cache_hits_total", "GET /items responses served from cache")
+MISSES = Counter("items_cache_misses_total", "GET /items responses loaded from the database")
+EVICTIONS = Counter("items_cache_evictions_total", "Cache entries dropped", ["reason"])  # ttl | lru | invalidate
+
+CachedBody = namedtuple("CachedBody", "body etag headers expires generation")
+
+
+# ---- Generation backends ----
+# Поколение — непрозрачная метка: запись в кэше действительна, пока метка не изменилась.
+class LocalGeneration:
+    def __init__(self):
+        self._gen = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        return self._gen
+
+    def bump(self):
+        with self._lock:
+            self._gen += 1
+
+
+class FileGeneration:
+    """Локальная замена общего бэкенда: метка — содержимое файла (uuid), общего для воркеров.
+    Не (inode, mtime): os.replace чередует пару inode, а при грубых часах три bump за один тик
+    дают A -> B -> A, и устаревшая запись снова считается действительной."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get(self):
+        # Чтение 32 байт из page cache; os.replace атомарен, поэтому видим старый или новый uuid целиком.
+        try:
+            with open(self.path) as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+
+    def bump(self):
+        tmp = f"{self.path}.{os.getpid()}.{uuid.uuid4().hex}"
+        with open(tmp, "w") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp, self.path)
+
+
+class RedisGeneration:
+    """Общее поколение для всех реплик. Требует пакет redis (pip install redis)."""
+
+    def __init__(self, url, key="devops-lab:items:generation"):
+        import redis
+        self._r = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.key = key
+
+    def get(self):
+        try:
+            return self._r.get(self.key) or b"0"
+        except Exception:
+            return None  # бэкенд недоступен — не рискуем отдать устаревшие данные
+
+    def bump(self):
+        try:
+            self._r.incr(self.key)
+        except Exception:
+            pass
+
+
+def make_backend(url):
+    if url == "local":
+        return LocalGeneration()
+    if url.startswith("file://"):
+        return FileGeneration(url[len("file://"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisGeneration(url)
+    raise ValueError(f"unsupported ITEMS_CACHE_BACKEND: {url}")
+
+
+def make_etag(body):
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+class ResponseCache:
+    """LRU-кэш готовых тел ответов с TTL и проверкой поколения."""
+
+    def __init__(self, backend, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def lookup(self, key):
+        """Возвращает (entry | None, generation). generation нужно передать в store()
+        после чтения из БД — так запись, случившаяся во время запроса, не попадёт в кэш."""
+        if not self.enabled:
+            return None, None
+        gen = self.backend.get()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires <= time.monotonic():
+                    del self._entries[key]
+                    EVICTIONS.labels("ttl").inc()
+                elif entry.generation != gen:
+                    del self._entries[key]
+                    EVICTIONS.labels("invalidate").inc()
+                else:
+                    self._entries.move_to_end(key)
+                    HITS.inc()
+                    return entry, gen
+        MISSES.inc()
+        return None, gen
+
+    def store(self, key, body, generation, headers=None):
+        entry = CachedBody(body, make_etag(body), headers or {}, time.monotonic() + self.ttl, generation)
+        if not self.enabled or generation is None:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                EVICTIONS.labels("lru").inc()
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+        if dropped:
+            EVICTIONS.labels("invalidate").inc(dropped)
+        if self.enabled:
+            self.backend.bump()
@@ -0,0 +1,122 @@
+# Подключение к Postgres для обоих режимов сервера.
+# Почему настройки пула вынесены в env: sync- и async-режим сравниваются при равных
+# размерах пула, а подбирать их удобнее без пересборки образа.
+import asyncio, os, threading, time
+
+from sqlalchemy import create_engine
+
+DB_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/appdb")
+
+# ---- Pool settings ----
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))              # постоянных соединений на процесс
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))       # сверх POOL_SIZE при пиках
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))     # секунды жизни соединения
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))     # ожидание свободного соединения
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "no")
+WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", "2"))  # открыть при старте воркера
+# Без таймаута connect() к адресу, который молча теряет пакеты (под БД переезжает), висит
+# до TCP-таймаута ОС — дольше timeout gunicorn (30 с), и арбитр убивает воркер за воркером.
+CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))  # секунды на установку соединения
+WARM_TIMEOUT = float(os.getenv("DB_WARM_TIMEOUT", "10"))       # на весь прогрев пула
+
+
+def connect_args(url):
+    driver = url.split("://", 1)[0]
+    if "asyncpg" in driver:
+        return {"timeout": CONNECT_TIMEOUT}
+    return {"connect_timeout": max(1, round(CONNECT_TIMEOUT))}  # libpq: целые секунды
+
+
+def pool_options(url):
+    if url.startswith("sqlite"):
+        return {}  # у SQLite свой пул без этих параметров (удобно для локальных проверок)
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_pre_ping": POOL_PRE_PING,
+        "connect_args": connect_args(url),
+    }
+
+
+def make_engine(url=DB_URL):
+    return create_engine(url, future=True, **pool_options(url))
+
+
+def async_url(url=DB_URL):
+    """postgresql://... -> postgresql+asyncpg://... (ASYNC_DATABASE_URL имеет приоритет)."""
+    explicit = os.getenv("ASYNC_DATABASE_URL")
+    if explicit:
+        return explicit
+    scheme, rest = url.split("://", 1)
+    if scheme.split("+")[0] in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def make_async_engine(url=None):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    url = url or async_url()
+    return create_async_engine(url, **pool_options(url))
+
+
+# ---- Lazy engines ----
+# Движок создаётся при первом обращении и заново после fork: импорт приложения не трогает БД,
+# а соединения пула не переходят из мастера gunicorn в воркеры.
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _lazy(kind, factory):
+    key = (kind, os.getpid())
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = factory()
+    return engine
+
+
+def get_engine():
+    return _lazy("sync", make_engine)
+
+
+def get_async_engine():
+    return _lazy("async", make_async_engine)
+
+
+# ---- Warm-up ----
+# Соединения открываются одновременно (держим все до конца), иначе пул отдаст одно и то же.
+# Прогрев ограничен DB_WARM_TIMEOUT: в sync-режиме он идёт в post_worker_init, когда воркер
+# ещё не шлёт heartbeat арбитру. Неудача не страшна — /ready вернёт 503 и повторит прогрев.
+def warm_pool(engine, n=WARM_CONNECTIONS, timeout=WARM_TIMEOUT):
+    """Открывает n соединений пула, проверяет их SELECT 1 и возвращает в пул.
+    Новое соединение не начинается после timeout, так что в худшем случае это timeout + DB_CONNECT_TIMEOUT."""
+    deadline = time.monotonic() + timeout
+    conns = []
+    try:
+        for _ in range(n):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"pool warm-up took longer than {timeout}s")
+            conns.append(engine.connect())
+            conns[-1].exec_driver_sql("SELECT 1")
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+async def warm_pool_async(engine, n=WARM_CONNECTIONS, timeout=WARM_TIMEOUT):
+    conns = []
+
+    async def open_all():
+        for _ in range(n):
+            conns.append(await engine.connect())
+            await conns[-1].exec_driver_sql("SELECT 1")
+
+    try:
+        await asyncio.wait_for(open_all(), timeout)
+    finally:
+        for conn in conns:
+            await conn.close()
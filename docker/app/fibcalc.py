@@ -0,0 +1,221 @@
+# Вычислитель для /compute: числа Фибоначчи быстрым удвоением — O(log n) умножений
+# вместо экспоненциальной рекурсии, которая держала поток gunicorn (и GIL) секундами.
+# Готовые значения лежат в LRU; тяжёлые запросы можно вынести в пул процессов.
+import asyncio, decimal, multiprocessing, os, threading, time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from prometheus_client import Histogram
+
+# ---- Settings ----
+# По умолчанию F(n) не длиннее 4300 цифр (F(20000) — 4180): такое JSON-число разбирает json.loads
+# с настройками по умолчанию. F(100000) — ~21 тыс. цифр, ~7 мс на расчёт и перевод в строку; дальше
+# время растёт быстрее n, поэтому большие значения стоит включать вместе с пулом процессов.
+MAX_N = int(os.getenv("COMPUTE_MAX_N", "20000"))
+CACHE_SIZE = int(os.getenv("COMPUTE_CACHE_SIZE", "1024"))       # сколько результатов помнит LRU
+POOL_WORKERS = int(os.getenv("COMPUTE_POOL_WORKERS", "0"))      # 0 — считать в потоке запроса
+OFFLOAD_MIN_N = int(os.getenv("COMPUTE_OFFLOAD_MIN_N", "30000"))  # с какого n отправлять в пул
+TIMEOUT = float(os.getenv("COMPUTE_TIMEOUT", "2"))              # секунды ожидания результата из пула
+THREAD_MIN_N = int(os.getenv("COMPUTE_THREAD_MIN_N", "5000"))   # async: с какого n считать не в event loop
+
+# ---- Metrics ----
+# mode: cache — ответ из LRU, inline — в потоке запроса, thread — в потоке asyncio.to_thread, pool — в пуле процессов
+QUEUE_LAT = Histogram("compute_queue_seconds", "Time a /compute job waited before it started", ["mode"])
+COMPUTE_LAT = Histogram("compute_seconds", "Time spent computing a /compute result", ["mode"])
+
+
+class ComputeInputError(ValueError):
+    """Недопустимое n (ответ 400)."""
+
+
+class ComputeTimeout(Exception):
+    """Результат не получен за COMPUTE_TIMEOUT (ответ 504)."""
+
+
+def parse_n(raw):
+    try:
+        n = int(raw)
+    except (TypeError, ValueError):
+        raise ComputeInputError("n: expected integer")
+    if not 0 <= n <= MAX_N:
+        raise ComputeInputError(f"n: expected 0..{MAX_N}")
+    return n
+
+
+def fib(n):
+    """F(n) быстрым удвоением: F(2k) = F(k)(2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2."""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == "1" else (c, d)
+    return a
+
+
+_EXACT = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX)
+_SPLIT_BITS = 1 << 15  # до ~10 тыс. цифр Decimal(int) переводит одним вызовом за доли миллисекунды
+
+
+def _to_decimal(v):
+    # Делим число пополам по битам: hi * 2^k + lo. Каждый шаг — отдельный короткий вызов C,
+    # между ними GIL отпускается (важно для asyncio.to_thread), и в сумме это быстрее Decimal(v).
+    if v.bit_length() <= _SPLIT_BITS:
+        return decimal.Decimal(v)
+    k = v.bit_length() // 2
+    hi = _EXACT.multiply(_to_decimal(v >> k), _EXACT.power(decimal.Decimal(2), k))
+    return _EXACT.add(hi, _to_decimal(v & ((1 << k) - 1)))
+
+
+def fib_digits(n):
+    """F(n) десятичной строкой. Через Decimal, а не str(int): на str(int) действует лимит Python
+    в 4300 цифр, а sys.set_int_max_str_digits меняет его для всего процесса."""
+    return str(_to_decimal(fib(n)))
+
+
+JSON_MAX_DIGITS = 4300  # sys.get_int_max_str_digits() по умолчанию: длиннее json.loads не разберёт
+
+
+def to_json(n, digits):
+    """Тело ответа /compute без перевода строки обратно в int. F(n) — JSON-число, как раньше,
+    а длиннее JSON_MAX_DIGITS — строка: иначе ответ не разберут json.loads и requests .json()."""
+    fib = digits if len(digits) <= JSON_MAX_DIGITS else f'"{digits}"'
+    return f'{{"fib":{fib},"n":{n}}}\n'
+
+
+def _job(n, submitted):
+    # Выполняется в процессе пула; time.time() сравним между процессами, monotonic — не обязательно.
+    # В основной процесс уходит готовая строка: перевод в десятичную запись — заметная часть работы.
+    started = time.time()
+    res = fib_digits(n)
+    return res, started - submitted, time.time() - started
+
+
+# ---- Process pool ----
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    # Пул создаётся лениво в каждом воркере gunicorn. spawn, а не fork: форк
+    # многопоточного процесса может унести в дочерний захваченные блокировки.
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = ProcessPoolExecutor(POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def warm_pool():
+    """Поднимает процессы пула заранее, чтобы первый тяжёлый запрос не платил за spawn."""
+    if POOL_WORKERS > 0:
+        pool = _get_pool()
+        for fut in [pool.submit(fib, 0) for _ in range(POOL_WORKERS)]:
+            fut.result()
+
+
+# ---- Results LRU ----
+# Своё LRU, а не functools.lru_cache: результаты из пула процессов тоже должны в него попадать.
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def _cached(n):
+    with _results_lock:
+        res = _results.get(n)
+        if res is not None:
+            _results.move_to_end(n)
+        return res
+
+
+def _remember(n, res):
+    if CACHE_SIZE <= 0:
+        return
+    with _results_lock:
+        _results[n] = res
+        _results.move_to_end(n)
+        while len(_results) > CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def _from_cache(n, start):
+    res = _cached(n)
+    if res is not None:
+        QUEUE_LAT.labels("cache").observe(0)
+        COMPUTE_LAT.labels("cache").observe(time.perf_counter() - start)
+    return res
+
+
+def _computed(n, res, start, mode):
+    QUEUE_LAT.labels(mode).observe(0)
+    COMPUTE_LAT.labels(mode).observe(time.perf_counter() - start)
+    _remember(n, res)
+    return res
+
+
+def _inline(n, start):
+    return _computed(n, fib_digits(n), start, "inline")
+
+
+def _offload(n):
+    return POOL_WORKERS > 0 and n >= OFFLOAD_MIN_N
+
+
+def _pool_done(n, res, queued, took):
+    QUEUE_LAT.labels("pool").observe(max(0.0, queued))
+    COMPUTE_LAT.labels("pool").observe(took)
+    _remember(n, res)
+    return res
+
+
+def _pool_broken():
+    global _pool_pid
+    _pool_pid = None  # процесс пула умер — следующий запрос создаст пул заново
+
+
+def run(n):
+    """Возвращает F(n) десятичной строкой: из LRU, в потоке запроса или в пуле
+    (если он включён и n >= COMPUTE_OFFLOAD_MIN_N)."""
+    start = time.perf_counter()
+    res = _from_cache(n, start)
+    if res is not None:
+        return res
+    if not _offload(n):
+        return _inline(n, start)
+    fut = _get_pool().submit(_job, n, time.time())
+    try:
+        return _pool_done(n, *fut.result(timeout=TIMEOUT))
+    except FutureTimeout:
+        fut.cancel()  # снимет задачу, если она ещё в очереди; начатую досчитает процесс пула
+        raise ComputeTimeout(f"no result within {TIMEOUT}s")
+    except BrokenProcessPool:
+        _pool_broken()
+        raise
+
+
+async def run_async(n):
+    """То же для ASGI-режима: ни расчёт, ни ожидание пула не блокируют event loop.
+    Без пула промахи с n >= COMPUTE_THREAD_MIN_N считаются в asyncio.to_thread, а не в loop.
+    Поток делит GIL с loop (переключение раз в sys.getswitchinterval(), 5 мс), поэтому loop
+    замедляется, но не стоит весь расчёт: при F(300000) самая долгая пауза ~15 мс против ~220 мс
+    в потоке loop. Для таких n всё равно лучше пул процессов."""
+    start = time.perf_counter()
+    res = _from_cache(n, start)
+    if res is not None:
+        return res
+    if not _offload(n):
+        if n < THREAD_MIN_N:
+            return _inline(n, start)
+        return _computed(n, await asyncio.to_thread(fib_digits, n), start, "thread")
+    fut = _get_pool().submit(_job, n, time.time())
+    try:
+        return _pool_done(n, *await asyncio.wait_for(asyncio.wrap_future(fut), TIMEOUT))
+    except asyncio.TimeoutError:
+        fut.cancel()
+        raise ComputeTimeout(f"no result within {TIMEOUT}s")
+    except BrokenProcessPool:
+        _pool_broken()
+        raise
@@ -0,0 +1,46 @@
+# Конфигурация gunicorn для обоих режимов сервера.
+# SERVER_MODE=sync  — Flask (WSGI), потоки; прежний режим по умолчанию.
+# SERVER_MODE=async — Starlette (ASGI) на uvicorn-воркерах, БД через asyncpg.
+# Число воркеров одинаковое, чтобы режимы сравнивались при равном CPU.
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", "sync")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_WORKERS", "2"))
+
+if SERVER_MODE == "async":
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "app:app"
+    threads = int(os.getenv("WEB_THREADS", "4"))
+
+
+# ---- Prometheus multiprocess ----
+# Каждый воркер пишет метрики в файлы PROMETHEUS_MULTIPROC_DIR, /metrics суммирует их.
+# Каталог очищается при старте мастера, чтобы не тянуть значения прошлого запуска.
+def on_starting(server):
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        import shutil
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+# ---- Warm-up ----
+# Воркер уже импортировал приложение, но ещё не принимает запросы: открываем соединения
+# пула и заполняем кэши здесь, чтобы за это не платили первые запросы после выката.
+# В async-режиме прогрев делает lifespan Starlette (asyncpg привязан к event loop воркера).
+# Heartbeat арбитру здесь ещё не идёт: прогрев ограничен DB_CONNECT_TIMEOUT/DB_WARM_TIMEOUT
+# (см. db.py), иначе недоступная БД приводила бы к WORKER TIMEOUT и перезапускам по кругу.
+def post_worker_init(worker):
+    if SERVER_MODE != "async":
+        import startup
+        startup.warm()
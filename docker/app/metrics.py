@@ -0,0 +1,125 @@
+# HTTP-метрики для обоих режимов сервера (Flask и ASGI).
+# Почему так устроено:
+# - запросы записываются хуком/middleware, а не вызовами в каждом обработчике;
+# - дочерние серии (labels) кэшируются в словаре: labels() на каждый запрос — это
+#   блокировка и сборка кортежа меток;
+# - при нескольких воркерах gunicorn (PROMETHEUS_MULTIPROC_DIR) /metrics собирает
+#   значения всех процессов, а не только того воркера, который ответил;
+# - готовый текст /metrics кэшируется на METRICS_CACHE_TTL, чтобы частые скрейпы
+#   не конкурировали с обработкой запросов.
+import os, threading, time
+
+from prometheus_client import (CollectorRegistry, Counter, Histogram, GCCollector, ProcessCollector,
+                               REGISTRY, generate_latest, CONTENT_TYPE_LATEST)
+
+# ---- Settings ----
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")             # задаётся в Dockerfile
+CACHE_TTL = float(os.getenv("METRICS_CACHE_TTL", "1"))            # секунды; 0 — без кэша
+
+# ---- Metrics ----
+REQ = Counter("http_requests_total", "Total HTTP requests", ["method", "endpoint", "code"])
+LAT = Histogram("http_request_duration_seconds", "Request latency seconds", ["endpoint"])
+
+# ---- Recording ----
+_children = {}
+
+
+def _bind(method, endpoint, code):
+    pair = (REQ.labels(method, endpoint, str(code)), LAT.labels(endpoint))
+    _children[(method, endpoint, code)] = pair
+    return pair
+
+
+def prebind(routes):
+    """Заранее создаёт серии успешных ответов для известных маршрутов: routes — пары (method, endpoint)."""
+    for method, endpoint in routes:
+        _bind(method, endpoint, 201 if method == "POST" else 200)
+
+
+def observe(endpoint, method, code, seconds):
+    # Словарь читается без блокировки: при гонке серия просто создастся дважды (labels идемпотентен).
+    req, lat = _children.get((method, endpoint, code)) or _bind(method, endpoint, code)
+    req.inc()
+    lat.observe(seconds)
+
+
+# ---- Exposition ----
+def _make_registry():
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    # process_* и python_gc_* в multiprocess-режиме — значения ответившего воркера.
+    ProcessCollector(registry=registry)
+    GCCollector(registry=registry)
+    return registry
+
+
+_registry = _make_registry()
+_cached = (0.0, b"")
+_render_lock = threading.Lock()
+
+
+def render():
+    """Текст /metrics; не чаще раза в METRICS_CACHE_TTL, параллельные скрейпы ждут один рендер."""
+    global _cached
+    expires, body = _cached
+    if time.monotonic() < expires:
+        return body
+    with _render_lock:
+        expires, body = _cached
+        if time.monotonic() < expires:
+            return body
+        body = generate_latest(_registry)
+        _cached = (time.monotonic() + CACHE_TTL, body)
+        return body
+
+
+# ---- Flask ----
+def init_flask(app):
+    """before/after_request-хуки. Метка endpoint — шаблон маршрута, неизвестные пути — unmatched."""
+    from flask import g, request
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_record(resp):
+        start = g.get("metrics_start")
+        if start is not None:
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            observe(endpoint, request.method, resp.status_code, time.perf_counter() - start)
+        return resp
+
+    prebind((m, r.rule) for r in app.url_map.iter_rules() if r.endpoint != "static"
+            for m in r.methods - {"HEAD", "OPTIONS"})
+
+
+# ---- ASGI ----
+class MetricsMiddleware:
+    """ASGI-middleware с той же логикой; endpoints — множество известных путей."""
+
+    def __init__(self, app, endpoints):
+        self.app = app
+        self.endpoints = frozenset(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            path = scope["path"]
+            observe(path if path in self.endpoints else "unmatched", scope["method"], status,
+                    time.perf_counter() - start)
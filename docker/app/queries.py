@@ -0,0 +1,193 @@
+# Запросы к items: keyset-пагинация и потоковая выгрузка.
+# Почему keyset, а не OFFSET: «WHERE id < :after ORDER BY id DESC LIMIT n» идёт по индексу
+# первичного ключа и стоит одинаково на первой и на миллионной странице.
+# С фильтром since/until порядок — (created_at, id): ровно порядок индекса items_created_at_id_idx,
+# поэтому Postgres читает только диапазон и не сортирует его перед первой строкой.
+import base64, csv, io, json, os
+from datetime import datetime
+from urllib.parse import urlencode
+
+from prometheus_client import Counter
+from sqlalchemy import text
+
+# ---- Metrics ----
+EXPORT_ROWS = Counter("items_export_rows_total", "Rows streamed by /items/export", ["format"])
+
+# ---- Settings ----
+PAGE_DEFAULT = 10                                       # прежнее поведение GET /items
+PAGE_MAX = int(os.getenv("ITEMS_PAGE_MAX", "1000"))
+EXPORT_CHUNK = int(os.getenv("ITEMS_EXPORT_CHUNK", "2000"))  # строк за одну выборку серверного курсора
+
+
+class QueryParamError(ValueError):
+    """Некорректный параметр запроса (ответ 400)."""
+
+
+# ---- Cursor ----
+# v1:<id> — страницы по id; v2:<created_at>|<id> — страницы с фильтром since/until.
+def encode_cursor(last_id, created_at=None):
+    raw = f"v1:{last_id}" if created_at is None else f"v2:{_ts(created_at)}|{last_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Возвращает (created_at | None, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        version, value = raw.split(":", 1)
+        if version == "v1":
+            return None, int(value)
+        if version == "v2":
+            ts, last_id = value.rsplit("|", 1)
+            return datetime.fromisoformat(ts), int(last_id)
+        raise ValueError(version)
+    except ValueError:
+        raise QueryParamError("invalid cursor")
+
+
+# ---- Params ----
+def _parse_ts(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryParamError(f"{name}: expected ISO 8601 timestamp")
+
+
+def parse_export(args):
+    """(формат, фильтр) для /items/export."""
+    fmt = args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        raise QueryParamError(f"format: expected one of {', '.join(EXPORT_FORMATS)}")
+    return fmt, parse_range(args)
+
+
+def parse_range(args):
+    """Фильтр по created_at: since включительно, until — не включительно."""
+    return {"since": _parse_ts(args, "since"), "until": _parse_ts(args, "until")}
+
+
+def parse_page(args):
+    params = parse_range(args)
+    try:
+        limit = int(args.get("limit", PAGE_DEFAULT))
+    except ValueError:
+        raise QueryParamError("limit: expected integer")
+    if not 1 <= limit <= PAGE_MAX:
+        raise QueryParamError(f"limit: expected 1..{PAGE_MAX}")
+    params["limit"] = limit
+    params["after"] = decode_cursor(args["after"]) if args.get("after") else None
+    if params["after"] and has_range(params) and params["after"][0] is None:
+        raise QueryParamError("after: cursor does not match since/until")
+    return params
+
+
+def has_range(params):
+    return params["since"] is not None or params["until"] is not None
+
+
+def cache_key(params):
+    return "items:{after}:{limit}:{since}:{until}".format(**params)
+
+
+# ---- SQL ----
+def _range_where(params, where, binds):
+    if params["since"] is not None:
+        where.append("created_at >= :since")
+        binds["since"] = params["since"]
+    if params["until"] is not None:
+        where.append("created_at < :until")
+        binds["until"] = params["until"]
+
+
+def page_query(params):
+    """Запрос страницы (новые записи первыми). Берём limit + 1 строку, чтобы знать, есть ли следующая."""
+    where, binds = [], {"limit": params["limit"] + 1}
+    ranged = has_range(params)
+    if params["after"] is not None:
+        after_ts, binds["after"] = params["after"]
+        if ranged:
+            where.append("(created_at, id) < (:after_ts, :after)")
+            binds["after_ts"] = after_ts
+        else:
+            where.append("id < :after")
+    _range_where(params, where, binds)
+    sql = "SELECT id, name, created_at FROM items"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    order = "created_at DESC, id DESC" if ranged else "id DESC"
+    return text(f"{sql} ORDER BY {order} LIMIT :limit"), binds
+
+
+def page_result(rows, params):
+    """Возвращает (список записей, курсор следующей страницы | None)."""
+    page = rows[:params["limit"]]
+    out = [{"id": r[0], "name": r[1]} for r in page]
+    next_cursor = None
+    if len(rows) > params["limit"]:
+        last = page[-1]
+        next_cursor = encode_cursor(last[0], last[2] if has_range(params) else None)
+    return out, next_cursor
+
+
+def page_response(rows, params, path, args):
+    """Тело ответа GET /items и заголовки со ссылкой на следующую страницу (общие для sync и async)."""
+    out, next_cursor = page_result(rows, params)
+    headers = {}
+    if next_cursor:
+        nxt = {**args, "after": next_cursor}
+        headers = {"X-Next-Cursor": next_cursor, "Link": f'<{path}?{urlencode(nxt)}>; rel="next"'}
+    return json.dumps(out, separators=(",", ":")).encode() + b"\n", headers
+
+
+def export_query(params):
+    where, binds = [], {}
+    _range_where(params, where, binds)
+    sql = "SELECT id, name, created_at FROM items"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # Без фильтра — по первичному ключу, с фильтром — в порядке индекса (created_at, id):
+    # иначе Postgres сортирует весь диапазон до первой строки и поток теряет смысл.
+    return text(sql + (" ORDER BY created_at, id" if has_range(params) else " ORDER BY id")), binds
+
+
+# ---- Export ----
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _ts(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _export_chunk(part, fmt):
+    EXPORT_ROWS.labels(fmt).inc(len(part))
+    if fmt == "csv":
+        buf = io.StringIO()
+        csv.writer(buf).writerows((r[0], r[1], _ts(r[2])) for r in part)
+        return buf.getvalue().encode()
+    return "".join(json.dumps({"id": r[0], "name": r[1], "created_at": _ts(r[2])}) + "\n" for r in part).encode()
+
+
+def iter_export(engine, params, fmt):
+    """Генератор чанков выгрузки. Серверный курсор (stream_results + yield_per) держит
+    в памяти не больше EXPORT_CHUNK строк, сколько бы их ни было в таблице."""
+    sql, binds = export_query(params)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_CHUNK).execute(sql, binds)
+        if fmt == "csv":
+            yield b"id,name,created_at\r\n"
+        for part in result.partitions():
+            yield _export_chunk(part, fmt)
+
+
+async def aiter_export(engine, params, fmt):
+    """То же для ASGI-режима: AsyncConnection.stream() — серверный курсор asyncpg."""
+    sql, binds = export_query(params)
+    async with engine.connect() as conn:
+        result = await conn.stream(sql, binds)
+        if fmt == "csv":
+            yield b"id,name,created_at\r\n"
+        async for part in result.partitions(EXPORT_CHUNK):
+            yield _export_chunk(part, fmt)
@@ -0,0 +1,117 @@
+# Старт воркера: замер фаз (импорт приложения, прогрев) и готовность для /ready.
+# Почему: при RollingUpdate под получает трафик, как только readinessProbe ответила 200.
+# Если первые запросы сами открывают соединения к БД и заполняют кэши, каждый выкат даёт
+# всплеск задержки. Поэтому воркер прогревается заранее, а /ready ждёт конца прогрева.
+import time
+
+STARTED = time.perf_counter()  # модуль импортируется первым в app.py / asgi.py
+
+import inspect, sys, threading
+
+from prometheus_client import Counter, Gauge
+
+# ---- Metrics ----
+# livemax: при нескольких воркерах видно самый медленный из живых.
+PHASE = Gauge("app_startup_phase_seconds", "Duration of worker startup phases", ["phase"],
+              multiprocess_mode="livemax")
+READY = Gauge("app_ready", "1 when every live worker finished warm-up", multiprocess_mode="livemin")
+WARM_FAILURES = Counter("app_warmup_failures_total", "Failed warm-up steps", ["step"])
+
+# ---- State ----
+_steps = []        # (name, fn) в порядке регистрации; fn может быть корутинной функцией
+_done = set()
+_timings = {}
+_lock = threading.Lock()
+_ready = False
+
+
+def register(name, fn):
+    """Добавляет шаг прогрева. Шаги выполняются по порядку, упавший повторяется при следующем warm()."""
+    _steps.append((name, fn))
+
+
+def _record(phase, seconds):
+    _timings[phase] = round(seconds, 6)
+    PHASE.labels(phase).set(seconds)
+
+
+def imported():
+    """Вызывается в конце модуля приложения: время импорта кода и зависимостей."""
+    _record("import", time.perf_counter() - STARTED)
+
+
+def _step_failed(name, e):
+    WARM_FAILURES.labels(name).inc()
+    print(f"startup: warm-up step {name!r} failed: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+
+def _step_done(name, start):
+    _record(f"warm_{name}", time.perf_counter() - start)
+    _done.add(name)
+
+
+def _mark_ready():
+    global _ready
+    _ready = True
+    _record("ready", time.perf_counter() - STARTED)
+    READY.set(1)
+
+
+def warm():
+    """Выполняет оставшиеся шаги прогрева; True, если воркер готов.
+    Повторный вызов (из /ready) доделывает шаги, упавшие на старте, например пока БД была недоступна."""
+    if _ready:
+        return True
+    if not _lock.acquire(blocking=False):
+        return False  # прогрев уже идёт в другом потоке
+    try:
+        for name, fn in _steps:
+            if name in _done:
+                continue
+            start = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                _step_failed(name, e)
+                return False
+            _step_done(name, start)
+        _mark_ready()
+        return True
+    finally:
+        _lock.release()
+
+
+async def warm_async():
+    """То же для ASGI-режима: шаги-корутины выполняются в event loop воркера."""
+    if _ready:
+        return True
+    if not _lock.acquire(blocking=False):
+        return False
+    try:
+        for name, fn in _steps:
+            if name in _done:
+                continue
+            start = time.perf_counter()
+            try:
+                res = fn()
+                if inspect.isawaitable(res):
+                    await res
+            except Exception as e:
+                _step_failed(name, e)
+                return False
+            _step_done(name, start)
+        _mark_ready()
+        return True
+    finally:
+        _lock.release()
+
+
+def status():
+    return {
+        "status": "ready" if _ready else "warming",
+        "pending": [name for name, _ in _steps if name not in _done],
+        "phases": dict(_timings),
+    }
+
+
+READY.set(0)
@@ -4,6 +4,11 @@ CREATE TABLE IF NOT EXISTS items (
     name TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT NOW()
 );
+-- Пагинация GET /items идёт по первичному ключу (id), отдельный индекс на id не нужен.
+-- Фильтр ?since=/&until= (GET /items и /items/export) читает этот индекс: с фильтром строки
+-- упорядочены по (created_at, id), как в индексе, поэтому диапазон не сортируется целиком,
+-- а id в ключе делает порядок однозначным для keyset-курсора.
+CREATE INDEX IF NOT EXISTS items_created_at_id_idx ON items (created_at, id);
 -- Существующая демо-таблица из прежнего примера (если была) — оставляем:
 CREATE TABLE IF NOT EXISTS notes (
     id SERIAL PRIMARY KEY,
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк накладных расходов на метрики приложения (docker/app/metrics.py).
+
+Сравнивает «до» и «после»:
+- запись одного запроса: REQ.labels(...).inc() + LAT.labels(...).observe() на каждый вызов
+  против metrics.observe() с закэшированными дочерними сериями;
+- запрос через Flask (test client): без метрик, ручной record() в обработчике, хуки metrics.init_flask.
+  Запрос стоит десятки микросекунд, а разница — единицы, поэтому режимы прогреваются и
+  чередуются раундами, а в отчёт идут медиана и минимум по раундам;
+- отдачу /metrics: generate_latest() на каждый скрейп против metrics.render() с кэшем.
+
+Запуск (нужны зависимости docker/app/requirements.txt):
+  python3 scripts/bench_metrics.py [--number 200000] [--rounds 21]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker", "app"))
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)  # сравниваем однопроцессный путь
+
+from flask import Flask, jsonify
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+
+import metrics
+
+ENDPOINTS = ["/health", "/env", "/items", "/compute", "/metrics"]
+
+
+def per_call_ns(fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    return best / number * 1e9
+
+
+def bench_record(number):
+    registry = CollectorRegistry()
+    req = Counter("http_requests_total", "Total HTTP requests", ["method", "endpoint", "code"], registry=registry)
+    lat = Histogram("http_request_duration_seconds", "Request latency seconds", ["endpoint"], registry=registry)
+    start = time.time()
+
+    def legacy():
+        req.labels("GET", "/items", "200").inc()
+        lat.labels("/items").observe(time.time() - start)
+
+    def cached():
+        metrics.observe("/items", "GET", 200, 0.001)
+
+    return per_call_ns(legacy, number), per_call_ns(cached, number)
+
+
+def make_app(mode):
+    app = Flask(f"bench-{mode}")
+    registry = CollectorRegistry()
+    req = Counter("http_requests_total", "Total HTTP requests", ["method", "endpoint", "code"], registry=registry)
+    lat = Histogram("http_request_duration_seconds", "Request latency seconds", ["endpoint"], registry=registry)
+
+    @app.get("/health")
+    def health():
+        start = time.time()
+        payload = {"status": "ok"}
+        if mode == "legacy":
+            req.labels("GET", "/health", "200").inc()
+            lat.labels("/health").observe(time.time() - start)
+        return jsonify(payload), 200
+
+    if mode == "hooks":
+        metrics.init_flask(app)
+    return app.test_client()
+
+
+FLASK_MODES = ("none", "legacy", "hooks")
+
+
+def bench_flask(number, rounds):
+    """Возвращает {mode: (медиана, минимум)} в нс/запрос. В каждом раунде все режимы идут
+    подряд маленькими пачками, порядок сдвигается от раунда к раунду: дрейф частоты CPU,
+    фоновые процессы и прогрев кэшей задевают все режимы одинаково."""
+    calls = {mode: (lambda c=make_app(mode): c.get("/health")) for mode in FLASK_MODES}
+    for fn in calls.values():
+        timeit.timeit(fn, number=max(100, number // 10))  # прогрев: импорты, кэши Werkzeug, серии метрик
+    samples = {mode: [] for mode in FLASK_MODES}
+    for i in range(rounds):
+        order = FLASK_MODES[i % len(FLASK_MODES):] + FLASK_MODES[:i % len(FLASK_MODES)]
+        for mode in order:
+            samples[mode].append(timeit.timeit(calls[mode], number=number) / number * 1e9)
+    return {mode: (statistics.median(v), min(v)) for mode, v in samples.items()}
+
+
+def bench_exposition(number):
+    # Наполняем реестр сериями, похожими на боевые: эндпоинты × коды.
+    for ep in ENDPOINTS:
+        for code in (200, 201, 400, 404, 500):
+            metrics.observe(ep, "GET", code, 0.01)
+    uncached = per_call_ns(lambda: generate_latest(metrics._registry), number)
+    cached = per_call_ns(metrics.render, number)
+    return uncached, cached
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--number", type=int, default=200000, help="вызовов записи метрик на прогон")
+    ap.add_argument("--rounds", type=int, default=21, help="раундов сравнения режимов Flask")
+    args = ap.parse_args()
+
+    legacy, cached = bench_record(args.number)
+    print("Запись одного запроса (нс/вызов)")
+    print(f"  labels() на каждый вызов : {legacy:10.0f}")
+    print(f"  metrics.observe()        : {cached:10.0f}   ({legacy / cached:.1f}x)")
+
+    flask = bench_flask(max(1, args.number // 500), args.rounds)
+    base_med, base_min = flask["none"]
+    print(f"Запрос GET /health через Flask test client (нс/запрос, {args.rounds} раундов)")
+    print(f"  {'':25}  {'медиана':>10} {'разница':>9}  {'минимум':>10} {'разница':>9}")
+    for mode, label in (("none", "без метрик"), ("legacy", "ручной record()"), ("hooks", "хуки init_flask()")):
+        med, low = flask[mode]
+        print(f"  {label:25}: {med:10.0f} {med - base_med:+9.0f}  {low:10.0f} {low - base_min:+9.0f}")
+
+    uncached, cached = bench_exposition(max(1, args.number // 100))
+    print("Отдача /metrics (нс/скрейп)")
+    print(f"  generate_latest()        : {uncached:10.0f}")
+    print(f"  metrics.render() с кэшем : {cached:10.0f}   (TTL {metrics.CACHE_TTL}s)")
+
+
+if __name__ == "__main__":
+    main()
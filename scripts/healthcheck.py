@@ -1,12 +1,335 @@
-# Проверка доступности API. Почему отдельный скрипт: удобно для CI и cron.
-import os, sys, urllib.request
-
-url = os.getenv("APP_HEALTH_URL", "http://localhost:8000/health")
-try:
-    with urllib.request.urlopen(url, timeout=3) as r:
-        body = r.read().decode("utf-8")
-        print("OK:", body)
-        sys.exit(0)
-except Exception as e:
-    print("FAIL:", e)
-    sys.exit(1)
+#!/usr/bin/env python3
+"""
+Проверка доступности сервисов devops-lab. Почему отдельный скрипт: удобно для CI, cron и k8s-проб.
+
+Все цели опрашиваются параллельно (asyncio), поэтому время проверки — это время самой
+медленной цели, а не сумма. Только стандартная библиотека: скрипт запускается в любом
+образе с Python 3.9+.
+
+Типы целей (по схеме URL):
+  http://, https://            GET, успех — ожидаемый HTTP-статус (по умолчанию 2xx/3xx)
+  pg://[user@]host:port[/db]   как pg_isready: сервер принимает подключения
+  tcp://host:port              TCP-соединение устанавливается
+
+Состояния: ok; degraded — ответ медленнее порога degraded_ms; fail — ошибка, таймаут, плохой статус.
+
+Режимы:
+  один проход (по умолчанию) — код выхода 0, если нет fail (с --strict — и degraded), иначе 1;
+  демон (--serve HOST:PORT)  — опрос каждые --interval секунд, /metrics для Prometheus и /health.
+
+Примеры:
+  python3 scripts/healthcheck.py                                    # APP_HEALTH_URL, как раньше
+  python3 scripts/healthcheck.py -t app=http://localhost:8000/health -t db=pg://localhost:5432
+  python3 scripts/healthcheck.py --config monitoring/healthcheck-targets.json --serve 0.0.0.0:9105
+
+Параметры окружения:
+  APP_HEALTH_URL  (по умолчанию http://localhost:8000/health) — цель, если не заданы другие
+  HEALTH_TARGETS  список "name=url,name=url" (дополняет --target)
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import struct
+import sys
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_TIMEOUT = 3.0
+
+
+class Target:
+    def __init__(self, name, url, timeout=DEFAULT_TIMEOUT, degraded_ms=None, expect_status=None):
+        self.name = name
+        self.url = url
+        self.timeout = float(timeout)
+        self.degraded_ms = float(degraded_ms) if degraded_ms is not None else None
+        self.expect_status = expect_status
+        self.parts = urlsplit(url)
+        self.kind = {"http": "http", "https": "http", "pg": "pg", "postgres": "pg",
+                     "postgresql": "pg", "tcp": "tcp"}.get(self.parts.scheme)
+        if self.kind is None or not self.parts.hostname:
+            raise ValueError(f"{name}: unsupported target URL {url!r}")
+        default_port = {"http": 80, "https": 443, "pg": 5432, "postgres": 5432, "postgresql": 5432}
+        self.host = self.parts.hostname
+        self.port = self.parts.port or default_port.get(self.parts.scheme)
+        if self.port is None:
+            raise ValueError(f"{name}: port is required for {url!r}")
+
+
+# ---- Probes ----
+class HttpProbe:
+    """Минимальный HTTP/1.1-клиент с keep-alive: в режиме демона соединение переиспользуется."""
+
+    def __init__(self, target):
+        self.t = target
+        self.reader = self.writer = None
+        path = target.parts.path or "/"
+        self.request = (f"GET {path}{'?' + target.parts.query if target.parts.query else ''} HTTP/1.1\r\n"
+                        f"Host: {target.parts.netloc}\r\nUser-Agent: devops-lab-healthcheck\r\n"
+                        f"Accept: */*\r\nConnection: keep-alive\r\n\r\n").encode()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def _read_head(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by peer")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return status, headers
+
+    async def _exchange(self):
+        self.writer.write(self.request)
+        await self.writer.drain()
+        status, headers = await self._read_head()
+        while 100 <= status < 200:  # промежуточные ответы (100 Continue и т.п.) без тела
+            status, headers = await self._read_head()
+        if status in (204, 304):
+            body = b""  # у этих статусов тела нет, даже без Content-Length: не ждём закрытия
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, body
+
+    async def run(self):
+        reused = self.writer is not None and not self.writer.is_closing()
+        if not reused:
+            self.close()
+            ctx = ssl.create_default_context() if self.t.parts.scheme == "https" else None
+            self.reader, self.writer = await asyncio.open_connection(self.t.host, self.t.port, ssl=ctx)
+        try:
+            status, body = await self._exchange()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+            return await self.run()  # keep-alive соединение протухло — одна попытка заново
+        expected = self.t.expect_status
+        ok = status == expected if expected else 200 <= status < 400
+        detail = f"HTTP {status} {body[:200].decode('utf-8', 'replace').strip()}"
+        return ok, detail
+
+
+class PgProbe:
+    """Как pg_isready: отправляем StartupMessage и смотрим на первый ответ сервера.
+    Запрос пароля или любая ошибка, кроме 57P03 (cannot_connect_now), значат «принимает подключения»."""
+
+    def __init__(self, target):
+        self.t = target
+        user = target.parts.username or "postgres"
+        db = target.parts.path.lstrip("/") or user
+        params = f"user\0{user}\0database\0{db}\0application_name\0healthcheck\0\0".encode()
+        self.startup = struct.pack("!ii", 8 + len(params), 196608) + params
+
+    def close(self):
+        pass
+
+    async def run(self):
+        reader, writer = await asyncio.open_connection(self.t.host, self.t.port)
+        try:
+            writer.write(self.startup)
+            await writer.drain()
+            kind = await reader.readexactly(1)
+            length = struct.unpack("!i", await reader.readexactly(4))[0]
+            payload = await reader.readexactly(length - 4)
+            if kind == b"E":
+                fields = {f[:1]: f[1:].decode("utf-8", "replace") for f in payload.split(b"\0") if f}
+                if fields.get(b"C") == "57P03":
+                    return False, f"rejecting connections: {fields.get(b'M', '')}"
+                return True, f"accepting connections ({fields.get(b'C')})"
+            writer.write(b"X\0\0\0\4")  # Terminate
+            return True, "accepting connections"
+        finally:
+            writer.close()
+
+
+class TcpProbe:
+    def __init__(self, target):
+        self.t = target
+
+    def close(self):
+        pass
+
+    async def run(self):
+        _, writer = await asyncio.open_connection(self.t.host, self.t.port)
+        writer.close()
+        return True, "connected"
+
+
+PROBES = {"http": HttpProbe, "pg": PgProbe, "tcp": TcpProbe}
+
+
+class Checker:
+    def __init__(self, targets, default_degraded_ms=None):
+        self.targets = targets
+        self.default_degraded_ms = default_degraded_ms
+        self.probes = {t.name: PROBES[t.kind](t) for t in targets}
+        self.results = {}
+        self.totals = {}
+        self.round_seconds = 0.0
+
+    async def _check(self, t):
+        probe = self.probes[t.name]
+        start = time.perf_counter()
+        try:
+            ok, detail = await asyncio.wait_for(probe.run(), t.timeout)
+        except asyncio.TimeoutError:
+            probe.close()
+            ok, detail = False, f"timeout after {t.timeout}s"
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+            probe.close()
+            ok, detail = False, f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - start
+        threshold = t.degraded_ms if t.degraded_ms is not None else self.default_degraded_ms
+        state = "fail" if not ok else "degraded" if threshold is not None and latency * 1000 > threshold else "ok"
+        result = {"name": t.name, "url": t.url, "state": state, "latency_s": round(latency, 6),
+                  "detail": detail, "checked_at": time.time()}
+        self.results[t.name] = result
+        key = (t.name, state)
+        self.totals[key] = self.totals.get(key, 0) + 1
+        return result
+
+    async def run_once(self):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._check(t) for t in self.targets))
+        self.round_seconds = time.perf_counter() - start
+        return results
+
+    def metrics_text(self):
+        lines = [
+            "# HELP healthcheck_up 1 if the target answered (ok or degraded), 0 if it failed",
+            "# TYPE healthcheck_up gauge",
+        ]
+        rs = [self.results[t.name] for t in self.targets if t.name in self.results]
+        lines += [f'healthcheck_up{{target="{r["name"]}"}} {int(r["state"] != "fail")}' for r in rs]
+        lines += ["# HELP healthcheck_state Current state of the target (one-hot)", "# TYPE healthcheck_state gauge"]
+        lines += [f'healthcheck_state{{target="{r["name"]}",state="{s}"}} {int(r["state"] == s)}'
+                  for r in rs for s in ("ok", "degraded", "fail")]
+        lines += ["# HELP healthcheck_latency_seconds Duration of the last probe", "# TYPE healthcheck_latency_seconds gauge"]
+        lines += [f'healthcheck_latency_seconds{{target="{r["name"]}"}} {r["latency_s"]}' for r in rs]
+        lines += ["# HELP healthcheck_last_probe_timestamp_seconds Unix time of the last probe",
+                  "# TYPE healthcheck_last_probe_timestamp_seconds gauge"]
+        lines += [f'healthcheck_last_probe_timestamp_seconds{{target="{r["name"]}"}} {r["checked_at"]:.3f}' for r in rs]
+        lines += ["# HELP healthcheck_probes_total Probes by resulting state", "# TYPE healthcheck_probes_total counter"]
+        lines += [f'healthcheck_probes_total{{target="{n}",state="{s}"}} {c}' for (n, s), c in sorted(self.totals.items())]
+        lines += ["# HELP healthcheck_round_duration_seconds Duration of the last concurrent round of probes",
+                  "# TYPE healthcheck_round_duration_seconds gauge", f"healthcheck_round_duration_seconds {self.round_seconds:.6f}"]
+        return "\n".join(lines) + "\n"
+
+
+# ---- Daemon ----
+async def serve(checker, host, port, interval):
+    async def handle(reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request_line.split()[1].decode() if len(request_line.split()) > 1 else "/"
+            if path == "/metrics":
+                body, ctype, status = checker.metrics_text().encode(), "text/plain; version=0.0.4; charset=utf-8", 200
+            elif path in ("/health", "/"):
+                results = list(checker.results.values())
+                failed = any(r["state"] == "fail" for r in results)
+                body = json.dumps({"status": "fail" if failed else "ok", "targets": results}).encode()
+                ctype, status = "application/json", 503 if failed else 200
+            else:
+                body, ctype, status = b"not found\n", "text/plain", 404
+            writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: {ctype}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"healthcheck: {len(checker.targets)} targets, every {interval}s, metrics on http://{host}:{port}/metrics",
+          flush=True)
+    async with server:
+        while True:
+            started = time.monotonic()
+            await checker.run_once()
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+# ---- CLI ----
+def load_targets(args):
+    targets = []
+    if args.config:
+        with open(args.config) as f:
+            for item in json.load(f):
+                item.setdefault("timeout", args.timeout)
+                targets.append(Target(**item))
+    specs = list(args.target)
+    if os.getenv("HEALTH_TARGETS"):
+        specs += [s for s in os.getenv("HEALTH_TARGETS").split(",") if s.strip()]
+    for spec in specs:
+        name, sep, url = spec.strip().partition("=")
+        if not sep:
+            name, url = urlsplit(spec).netloc or spec, spec
+        targets.append(Target(name, url, timeout=args.timeout))
+    if not targets:
+        targets.append(Target("app", os.getenv("APP_HEALTH_URL", "http://localhost:8000/health"), timeout=args.timeout))
+    return targets
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-t", "--target", action="append", default=[], help="цель name=url (можно несколько раз)")
+    ap.add_argument("-c", "--config", help="JSON-файл: [{name, url, timeout, degraded_ms, expect_status}]")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="таймаут цели по умолчанию, секунды")
+    ap.add_argument("--degraded-ms", type=float, default=None, help="порог degraded по умолчанию, мс")
+    ap.add_argument("--strict", action="store_true", help="degraded тоже даёт ненулевой код выхода")
+    ap.add_argument("--json", action="store_true", help="вывести результаты в JSON")
+    ap.add_argument("--serve", metavar="HOST:PORT", help="режим демона с /metrics и /health")
+    ap.add_argument("--interval", type=float, default=15, help="период опроса в режиме демона, секунды")
+    args = ap.parse_args()
+
+    try:
+        checker = Checker(load_targets(args), args.degraded_ms)
+    except (ValueError, TypeError, OSError) as e:
+        print(f"FAIL: bad configuration: {e}")
+        return 1
+
+    if args.serve:
+        host, _, port = args.serve.rpartition(":")
+        try:
+            asyncio.run(serve(checker, host or "0.0.0.0", int(port), args.interval))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    results = asyncio.run(checker.run_once())
+    if args.json:
+        print(json.dumps({"round_s": round(checker.round_seconds, 6), "targets": results}, ensure_ascii=False))
+    else:
+        for r in results:
+            label = {"ok": "OK", "degraded": "DEGRADED", "fail": "FAIL"}[r["state"]]
+            print(f"{label}: {r['name']} {r['latency_s'] * 1000:.1f}ms {r['detail']}")
+    bad = {"fail", "degraded"} if args.strict else {"fail"}
+    return 1 if any(r["state"] in bad for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
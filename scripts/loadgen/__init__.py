@@ -0,0 +1,5 @@
+"""
+Генератор нагрузки devops-lab на asyncio: открытая и закрытая модели нагрузки,
+смеси сценариев по API, HDR-гистограммы задержек и JSON-результаты для сравнения
+прогонов. Запуск: python3 -m loadgen --help (из каталога scripts/).
+"""
@@ -0,0 +1,107 @@
+"""
+Генератор нагрузки devops-lab (замена браузерного тестера из UI для больших RPS и CI).
+
+Примеры (из каталога scripts/):
+  python3 -m loadgen run --mode open --rate 500 --duration 60 --mix mixed --out base.json
+  python3 -m loadgen run --mode closed --users 64 --mix write --out write.json
+  python3 -m loadgen compare base.json new.json --threshold 10
+
+Профили --mix: write, read, health, compute, mixed или строка
+"GET /items=60,POST /items=30,GET /compute?n=30=10".
+
+Параметры окружения:
+  BASE_URL  (по умолчанию http://localhost:8000)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from .report import compare, format_summary
+from .runner import run
+from .scenarios import PRESETS, parse_mix
+
+
+def cmd_run(args):
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        raise SystemExit(f"--mix: {e}")
+    if args.mode == "open" and args.rate <= 0:
+        raise SystemExit("--rate must be > 0 for open-loop mode")
+    cfg = {
+        "url": args.url.rstrip("/"),
+        "mode": args.mode,
+        "rate": args.rate,
+        "connections": args.connections,
+        "users": args.users,
+        "think_ms": args.think_ms,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "timeout": args.timeout,
+        "co_interval_ms": args.co_interval_ms,
+        "seed": args.seed,
+    }
+    result = asyncio.run(run(cfg, mix))
+    print(format_summary(result))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Результаты сохранены в {args.out}")
+    return 0
+
+
+def cmd_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    table, regressions = compare(base, new, args.threshold, args.max_error_increase)
+    print(table)
+    if regressions:
+        print(f"\n❌ Регрессии ({len(regressions)}):")
+        for r in regressions:
+            print("  " + r)
+        return 1
+    print("\n✅ Регрессий нет.")
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="loadgen", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="прогнать нагрузку")
+    r.add_argument("--url", default=os.getenv("BASE_URL", "http://localhost:8000"))
+    r.add_argument("--mode", choices=("open", "closed"), default="open",
+                   help="open — постоянная частота, closed — N пользователей")
+    r.add_argument("--rate", type=float, default=50, help="запросов в секунду (open)")
+    r.add_argument("--connections", type=int, default=64, help="размер пула keep-alive соединений (open)")
+    r.add_argument("--users", type=int, default=10, help="одновременных пользователей (closed)")
+    r.add_argument("--think-ms", type=float, default=0, help="пауза пользователя между запросами (closed)")
+    r.add_argument("--duration", type=float, default=30, help="секунд измерения")
+    r.add_argument("--warmup", type=float, default=5, help="секунд прогрева без записи статистики")
+    r.add_argument("--timeout", type=float, default=10, help="таймаут запроса, секунды")
+    r.add_argument("--mix", default="mixed", help=f"профиль: {', '.join(PRESETS)} или своя строка")
+    r.add_argument("--co-interval-ms", type=float, default=0,
+                   help="ожидаемый интервал запросов для поправки на coordinated omission (closed)")
+    r.add_argument("--seed", type=int, default=None, help="seed выбора операций (для повторяемости)")
+    r.add_argument("--out", help="куда записать JSON с результатами")
+    r.set_defaults(func=cmd_run)
+
+    c = sub.add_parser("compare", help="сравнить два JSON-результата")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=10, help="допустимое ухудшение, %% (по умолчанию 10)")
+    c.add_argument("--max-error-increase", type=float, default=0.01,
+                   help="допустимый рост доли ошибок (0.01 = 1 п.п.)")
+    c.set_defaults(func=cmd_compare)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Гистограмма задержек в духе HdrHistogram: лог-линейные корзины с фиксированной
+относительной точностью (3 значащие цифры) и поправкой на coordinated omission.
+
+Значения — целые микросекунды. Гистограммы сериализуются в JSON и складываются,
+поэтому результаты разных прогонов можно сравнивать и объединять.
+"""
+import math
+
+SUB_BUCKET_BITS = 11                       # 2048 подкорзин: точность ~0.1% (3 значащие цифры)
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+
+
+def _index(value):
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return shift * SUB_BUCKET_HALF + (value >> shift)
+
+
+def _highest_equivalent(index):
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = index // SUB_BUCKET_HALF - 1
+    sub = index - shift * SUB_BUCKET_HALF
+    return ((sub + 1) << shift) - 1
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def record(self, value_us, count=1):
+        value_us = max(0, int(value_us))
+        idx = _index(value_us)
+        self.counts[idx] = self.counts.get(idx, 0) + count
+        self.total += count
+        self.sum += value_us * count
+        self.min = value_us if self.min is None else min(self.min, value_us)
+        self.max = max(self.max, value_us)
+
+    def record_corrected(self, value_us, expected_interval_us):
+        """Поправка на coordinated omission для закрытой нагрузки: если ответ задержался
+        дольше ожидаемого интервала, досчитываем запросы, которые клиент «не успел» отправить."""
+        self.record(value_us)
+        if expected_interval_us <= 0:
+            return
+        missing = value_us - expected_interval_us
+        while missing >= expected_interval_us:
+            self.record(missing)
+            missing -= expected_interval_us
+
+    def merge(self, other):
+        for idx, cnt in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + cnt
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(p / 100.0 * self.total))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                return min(_highest_equivalent(idx), self.max)
+        return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0
+
+    def summary_ms(self):
+        """p50/p90/p99/p999/max/mean в миллисекундах."""
+        out = {name: round(self.percentile(p) / 1000.0, 3)
+               for name, p in (("p50", 50), ("p90", 90), ("p99", 99), ("p999", 99.9))}
+        out["max"] = round(self.max / 1000.0, 3)
+        out["mean"] = round(self.mean() / 1000.0, 3)
+        out["count"] = self.total
+        return out
+
+    def to_dict(self):
+        return {"unit": "us", "sub_bucket_bits": SUB_BUCKET_BITS, "total": self.total, "sum": self.sum,
+                "min": self.min, "max": self.max, "counts": {str(k): v for k, v in sorted(self.counts.items())}}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("sub_bucket_bits") != SUB_BUCKET_BITS:
+            raise ValueError("histogram precision mismatch")
+        h = cls()
+        h.counts = {int(k): v for k, v in data["counts"].items()}
+        h.total, h.sum, h.min, h.max = data["total"], data["sum"], data["min"], data["max"]
+        return h
@@ -0,0 +1,53 @@
+"""
+Вывод результатов и сравнение двух прогонов (поиск регрессий).
+"""
+
+LATENCY_KEYS = ("p50", "p99", "p999")
+
+
+def format_summary(result):
+    cfg, s = result["config"], result["summary"]
+    lines = []
+    load = f"rate={cfg['rate']}/s connections={cfg['connections']}" if cfg["mode"] == "open" else f"users={cfg['users']}"
+    lines.append(f"{cfg['url']}  mode={cfg['mode']} {load}  duration={cfg['duration']}s  warmup={cfg['warmup']}s")
+    lines.append(f"{'operation':<28}{'req':>9}{'err':>7}{'rps':>10}{'p50':>10}{'p99':>10}{'p999':>10}{'max':>10}  (ms)")
+    rows = [("TOTAL", s)] + list(result["operations"].items())
+    for name, st in rows:
+        lat = st["latency_ms"]
+        lines.append(f"{name:<28}{st['requests']:>9}{st['errors']:>7}{st['throughput_rps']:>10.1f}"
+                     f"{lat['p50']:>10.2f}{lat['p99']:>10.2f}{lat['p999']:>10.2f}{lat['max']:>10.2f}")
+    if cfg["mode"] == "open" and s["throughput_rps"] < 0.95 * cfg["rate"]:
+        lines.append(f"! достигнуто {s['throughput_rps']:.1f} rps из {cfg['rate']} — клиент или сервер не успевает")
+    return "\n".join(lines)
+
+
+def _pct(old, new):
+    if not old:
+        return 0.0 if not new else float("inf")
+    return (new - old) / old * 100.0
+
+
+def compare(base, new, threshold, max_error_increase=0.01):
+    """Сравнивает прогоны по TOTAL и общим операциям. Регрессия — рост задержки или
+    падение пропускной способности больше чем на threshold процентов, либо рост доли
+    ошибок больше чем на max_error_increase (абсолютная доля, 0.01 = 1 п.п.)."""
+    lines, regressions = [], []
+    names = ["TOTAL"] + sorted(set(base["operations"]) & set(new["operations"]))
+    lines.append(f"{'operation':<28}{'metric':<16}{'base':>12}{'new':>12}{'change':>10}")
+    for name in names:
+        b = base["summary"] if name == "TOTAL" else base["operations"][name]
+        n = new["summary"] if name == "TOTAL" else new["operations"][name]
+        checks = [("throughput_rps", b["throughput_rps"], n["throughput_rps"], -1),
+                  ("error_rate", b["error_rate"], n["error_rate"], +1)]
+        checks += [(f"latency.{k}", b["latency_ms"][k], n["latency_ms"][k], +1) for k in LATENCY_KEYS]
+        for metric, old, cur, worse_sign in checks:
+            change = _pct(old, cur)
+            if metric == "error_rate":
+                bad = cur - old > max_error_increase
+            else:
+                bad = change * worse_sign > threshold
+            mark = "  REGRESSION" if bad else ""
+            lines.append(f"{name:<28}{metric:<16}{old:>12.3f}{cur:>12.3f}{change:>+9.1f}%{mark}")
+            if bad:
+                regressions.append(f"{name} {metric}: {old:.3f} -> {cur:.3f}")
+    return "\n".join(lines), regressions
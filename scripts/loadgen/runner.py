@@ -0,0 +1,155 @@
+"""
+Исполнитель нагрузки на asyncio + aiohttp с пулом keep-alive соединений.
+
+open   — открытая модель: запросы уходят с постоянной частотой (--rate) независимо от
+         ответов. Задержка считается от запланированного момента отправки, поэтому
+         очередь перед занятым сервером попадает в статистику (нет coordinated omission).
+closed — закрытая модель: N пользователей, каждый шлёт следующий запрос после ответа
+         на предыдущий. Поправка на coordinated omission — через --co-interval-ms.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+
+from .histogram import Histogram
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - зависимость ставится отдельно
+    aiohttp = None
+
+
+class OpStats:
+    def __init__(self):
+        self.latency = Histogram()       # от запланированного момента до ответа
+        self.service = Histogram()       # от фактической отправки до ответа
+        self.requests = 0
+        self.errors = {}
+
+    def add(self, intended, sent, done, error, co_interval_us):
+        self.requests += 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        latency_us = (done - intended) * 1e6
+        if co_interval_us:
+            self.latency.record_corrected(latency_us, co_interval_us)
+        else:
+            self.latency.record(latency_us)
+        self.service.record((done - sent) * 1e6)
+
+    def to_dict(self, duration):
+        errors = sum(self.errors.values())
+        return {
+            "requests": self.requests,
+            "errors": errors,
+            "error_rate": round(errors / self.requests, 6) if self.requests else 0.0,
+            "errors_by_kind": dict(sorted(self.errors.items())),
+            "throughput_rps": round(self.requests / duration, 3) if duration else 0.0,
+            "latency_ms": self.latency.summary_ms(),
+            "service_time_ms": self.service.summary_ms(),
+        }
+
+
+class Recorder:
+    def __init__(self, co_interval_us=0):
+        self.co_interval_us = co_interval_us
+        self.overall = OpStats()
+        self.ops = {}
+
+    def add(self, op, intended, sent, done, error):
+        for st in (self.overall, self.ops.setdefault(op.name, OpStats())):
+            st.add(intended, sent, done, error, self.co_interval_us)
+
+
+async def _send(session, base_url, op):
+    """Возвращает тип ошибки или None."""
+    try:
+        async with session.request(op.method, base_url + op.path, json=op.body()) as resp:
+            await resp.read()
+            return f"http_{resp.status}" if resp.status >= 400 else None
+    except asyncio.TimeoutError:
+        return "timeout"
+    except aiohttp.ClientError as e:
+        return type(e).__name__
+
+
+async def _one(session, cfg, op, rec, intended, measured):
+    loop = asyncio.get_running_loop()
+    sent = loop.time()
+    error = await _send(session, cfg["url"], op)
+    if measured:
+        rec.add(op, intended, sent, loop.time(), error)
+
+
+async def _open_loop(session, cfg, mix, rec, rng):
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / cfg["rate"]
+    start = loop.time()
+    warm_end = start + cfg["warmup"]
+    end = warm_end + cfg["duration"]
+    tasks = set()
+    i = 0
+    while True:
+        intended = start + i * interval
+        if intended >= end:
+            break
+        # При отставании от расписания всё равно отдаём управление, чтобы ответы обрабатывались.
+        await asyncio.sleep(max(0.0, intended - loop.time()))
+        task = asyncio.create_task(_one(session, cfg, mix.pick(rng), rec, intended, intended >= warm_end))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        i += 1
+    if tasks:
+        await asyncio.wait(tasks, timeout=cfg["timeout"] + 1)
+
+
+async def _closed_loop(session, cfg, mix, rec, rng):
+    loop = asyncio.get_running_loop()
+    warm_end = loop.time() + cfg["warmup"]
+    end = warm_end + cfg["duration"]
+
+    async def user():
+        while loop.time() < end:
+            sent = loop.time()
+            await _one(session, cfg, mix.pick(rng), rec, sent, sent >= warm_end)
+            if cfg["think_ms"]:
+                await asyncio.sleep(cfg["think_ms"] / 1000.0)
+
+    await asyncio.gather(*(user() for _ in range(cfg["users"])))
+
+
+async def run(cfg, mix):
+    """Прогоняет нагрузку по cfg и возвращает результат в виде словаря (готов к json.dump)."""
+    if aiohttp is None:
+        raise SystemExit("loadgen требует aiohttp: pip install aiohttp")
+    rng = random.Random(cfg["seed"])
+    rec = Recorder(int(cfg["co_interval_ms"] * 1000))
+    pool = cfg["users"] if cfg["mode"] == "closed" else cfg["connections"]
+    connector = aiohttp.TCPConnector(limit=pool, limit_per_host=pool, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=cfg["timeout"])
+    started = datetime.now(timezone.utc)
+    t0 = time.monotonic()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if cfg["mode"] == "open":
+            await _open_loop(session, cfg, mix, rec, rng)
+        else:
+            await _closed_loop(session, cfg, mix, rec, rng)
+    elapsed = time.monotonic() - t0
+    duration = cfg["duration"]
+    result = {
+        "version": 1,
+        "tool": "loadgen",
+        "started_at": started.isoformat(timespec="seconds"),
+        "wall_time_s": round(elapsed, 3),
+        "config": {**cfg, "mix": mix.describe()},
+        "summary": rec.overall.to_dict(duration),
+        "operations": {name: st.to_dict(duration) for name, st in sorted(rec.ops.items())},
+        "histograms": {
+            "latency": rec.overall.latency.to_dict(),
+            "service_time": rec.overall.service.to_dict(),
+        },
+    }
+    if cfg["mode"] == "open":
+        result["summary"]["target_rps"] = cfg["rate"]
+    return result
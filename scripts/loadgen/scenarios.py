@@ -0,0 +1,57 @@
+"""
+Сценарии нагрузки: взвешенная смесь операций над API приложения.
+
+Готовые профили повторяют режимы UI (WRITE/READ) и добавляют смешанные;
+свой профиль задаётся строкой вида "GET /items=60,POST /items=30,GET /compute?n=30=10".
+"""
+import random
+import uuid
+
+PRESETS = {
+    "write": "POST /items=100",
+    "read": "GET /items=100",
+    "health": "GET /health=100",
+    "compute": "GET /compute?n=32=100",
+    "mixed": "GET /items=60,POST /items=20,GET /compute?n=32=10,GET /health=10",
+}
+
+
+class Operation:
+    def __init__(self, method, path, weight):
+        self.method = method
+        self.path = path
+        self.weight = weight
+        self.name = f"{method} {path}"
+
+    def body(self):
+        # Как в UI: уникальное имя на каждую запись.
+        if self.method == "POST" and self.path.split("?")[0] == "/items":
+            return {"name": f"bench-{uuid.uuid4().hex[:8]}"}
+        return None
+
+
+class Mix:
+    def __init__(self, ops):
+        if not ops:
+            raise ValueError("empty scenario mix")
+        self.ops = ops
+        self._weights = [op.weight for op in ops]
+
+    def pick(self, rng=random):
+        return rng.choices(self.ops, weights=self._weights)[0]
+
+    def describe(self):
+        return {op.name: op.weight for op in self.ops}
+
+
+def parse_mix(spec):
+    """'METHOD PATH=WEIGHT,...' или имя готового профиля."""
+    spec = PRESETS.get(spec, spec)
+    ops = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        target, _, weight = part.rpartition("=")
+        method, _, path = target.strip().partition(" ")
+        if not target or not path.startswith("/") or not weight.replace(".", "", 1).isdigit():
+            raise ValueError(f"bad scenario entry: {part!r} (expected 'METHOD /path=WEIGHT')")
+        ops.append(Operation(method.upper(), path.strip(), float(weight)))
+    return Mix(ops)
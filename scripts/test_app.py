@@ -2,7 +2,7 @@
 """
 Интеграционный тест devops-lab:
 - Проверка модулей (импорт и версии)
-- Проверка API: /health, /env, /metrics
+- Проверка API: /health, /ready, /env, /metrics
 - CRUD-сценарий: POST /items -> GET /items
 - Проверка доступности pgAdmin (/misc/ping или /login)
 
@@ -12,6 +12,7 @@
   HTTP_TIMEOUT        (секунды, по умолчанию 5)
   HTTP_RETRIES        (число ретраев, по умолчанию 5)
   HTTP_RETRY_DELAY    (секунды между ретраями, по умолчанию 0.8)
+  SERVER_MODE         (sync | async, по умолчанию sync; только для вывода — маршруты одинаковые)
 """
 import os
 import sys
@@ -26,6 +27,7 @@ PGADMIN_URL = os.getenv("PGADMIN_URL", "http://localhost:5050")
 TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
 RETRIES = int(os.getenv("HTTP_RETRIES", "5"))
 RETRY_DELAY = float(os.getenv("HTTP_RETRY_DELAY", "0.8"))
+SERVER_MODE = os.getenv("SERVER_MODE", "sync")
 
 def print_section(title: str):
     print("\n" + "=" * 80)
@@ -75,7 +77,7 @@ def test_modules():
     require(ok_all, "Не все требуемые модули импортируются")
 
 def test_api():
-    print_section("Проверка API: /health, /env, /metrics")
+    print_section("Проверка API: /health, /ready, /env, /metrics")
     with requests.Session() as s:
         r = http_get(s, f"{BASE_URL}/health")
         require(r.status_code == 200, f"/health -> HTTP {r.status_code}")
@@ -83,6 +85,11 @@ def test_api():
         require(data.get("status") == "ok", f"/health payload: {data}")
         print("[OK] /health")
 
+        r = http_get(s, f"{BASE_URL}/ready")
+        require(r.status_code == 200, f"/ready -> HTTP {r.status_code}: {r.text[:200]}")
+        require(r.json().get("status") == "ready", f"/ready payload: {r.text[:200]}")
+        print("[OK] /ready")
+
         r = http_get(s, f"{BASE_URL}/env")
         require(r.status_code == 200, f"/env -> HTTP {r.status_code}")
         data = r.json()
@@ -96,12 +103,20 @@ def test_api():
                 "В /metrics не найдены ожидаемые базовые метрики")
         print("[OK] /metrics")
 
+        r = http_get(s, f"{BASE_URL}/compute?n=90")
+        require(r.status_code == 200 and r.json().get("fib") == 2880067194370816120,
+                f"/compute?n=90 -> HTTP {r.status_code}, body={r.text}")
+        r = http_get(s, f"{BASE_URL}/compute?n=-1")
+        require(r.status_code == 400, f"/compute?n=-1 -> HTTP {r.status_code}")
+        print("[OK] /compute")
+
 def test_crud_items():
     print_section("Сценарий: POST /items -> GET /items")
     uniq = f"loadtest-{uuid.uuid4().hex[:8]}"
     with requests.Session() as s:
         r = http_post_json(s, f"{BASE_URL}/items", {"name": uniq})
         require(r.status_code in (200, 201), f"POST /items -> HTTP {r.status_code}, body={r.text}")
+        require(isinstance(r.json().get("id"), int), f"POST /items без id: {r.text}")
         r = http_get(s, f"{BASE_URL}/items")
         require(r.status_code == 200, f"GET /items -> HTTP {r.status_code}")
         arr = r.json()
@@ -109,6 +124,39 @@ def test_crud_items():
                 f"Запись {uniq} не найдена в ответе GET /items")
         print("[OK] CRUD /items")
 
+        r = s.post(f"{BASE_URL}/items/bulk", json=[f"{uniq}-bulk-{i}" for i in range(3)], timeout=TIMEOUT)
+        require(r.status_code == 201 and r.json().get("inserted") == 3,
+                f"POST /items/bulk -> HTTP {r.status_code}, body={r.text}")
+        ndjson = "".join(f'{{"name": "{uniq}-nd-{i}"}}\n' for i in range(2))
+        r = s.post(f"{BASE_URL}/items/bulk", data=ndjson, timeout=TIMEOUT,
+                   headers={"Content-Type": "application/x-ndjson"})
+        require(r.status_code == 201 and r.json().get("inserted") == 2,
+                f"POST /items/bulk (NDJSON) -> HTTP {r.status_code}, body={r.text}")
+        print("[OK] POST /items/bulk")
+
+        r = http_get(s, f"{BASE_URL}/items?limit=2")
+        require(r.status_code == 200 and len(r.json()) == 2, f"GET /items?limit=2 -> HTTP {r.status_code}")
+        cursor = r.headers.get("X-Next-Cursor")
+        require(bool(cursor), "GET /items?limit=2 без X-Next-Cursor")
+        r2 = http_get(s, f"{BASE_URL}/items?limit=2&after={cursor}")
+        require(r2.status_code == 200 and r2.json() and r2.json()[0]["id"] < r.json()[-1]["id"],
+                f"Вторая страница GET /items некорректна: {r2.text}")
+        print("[OK] GET /items (keyset-пагинация)")
+
+        etag = r.headers.get("ETag")
+        require(bool(etag), "GET /items без ETag")
+        for tag in (etag, f"W/{etag}"):  # If-None-Match сравнивается слабо (RFC 9110)
+            r3 = s.get(f"{BASE_URL}/items?limit=2", headers={"If-None-Match": tag}, timeout=TIMEOUT)
+            require(r3.status_code == 304 and not r3.content,
+                    f"GET /items с If-None-Match: {tag} -> HTTP {r3.status_code}")
+        print("[OK] GET /items (ETag -> 304)")
+
+        r = http_get(s, f"{BASE_URL}/items/export?format=csv")
+        require(r.status_code == 200 and r.text.startswith("id,name,created_at"),
+                f"GET /items/export -> HTTP {r.status_code}")
+        require(f"{uniq}-bulk-0" in r.text, f"GET /items/export без записи {uniq}-bulk-0")
+        print("[OK] GET /items/export")
+
 def test_pgadmin():
     print_section("Проверка pgAdmin")
     with requests.Session() as s: